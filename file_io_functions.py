@@ -2,6 +2,9 @@
 
 import os
 import re
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+import globals as gl
 
 # Global constants
 FOAM_TAB_SIZE = 4
@@ -63,10 +66,88 @@ def convert_input_to_str(input_data, delim=' '):
     return input_str
 
 
+def resolve_foam_path(file_path):
+
+    """
+    Get the path under which an OpenFOAM file is stored, i.e.
+    file_path + '.gz' if only the compressed file exists
+
+    Inputs:
+        - file_path: path of OF-file
+    Returns:
+        - file_path: path of the existing plain or compressed file
+    """
+
+    if not file_path.endswith('.gz') and not os.path.isfile(file_path) \
+            and os.path.isfile(file_path + '.gz'):
+        return file_path + '.gz'
+    return file_path
+
+
+def read_foam_text(file_path):
+
+    """
+    Read an OpenFOAM file as text. The file is decoded with latin-1 and
+    without newline translation to keep the bytes of binary list bodies
+    unchanged. Compressed files ending with .gz are decompressed and
+    file_path + '.gz' is read if file_path does not exist.
+
+    Inputs:
+        - file_path: path of OF-file
+    Returns:
+        - text: file content as string
+    """
+
+    file_path = resolve_foam_path(file_path)
+    if file_path.endswith('.gz'):
+        import gzip
+        with gzip.open(file_path, 'rt', encoding='latin-1',
+                       newline='') as f:
+            return f.read()
+    with open(file_path, 'r', encoding='latin-1', newline='') as f:
+        return f.read()
+
+
+def read_appended_lines(file_path, offset=0, max_bytes=None):
+
+    """
+    Read the complete lines appended to a growing file after a byte offset.
+    A trailing partial line is left unread so that it is returned in full by
+    a later call. If the file became smaller than the offset, it is assumed
+    to be rewritten and reading restarts from the beginning.
+
+    Inputs:
+        - file_path: path of file to read
+        - offset: byte offset from which to start reading (default: 0)
+        - max_bytes: maximum number of bytes to read (default: None, all)
+    Returns:
+        - lines: list of new complete lines
+        - offset: byte offset following the last complete line read
+    """
+
+    size = os.path.getsize(file_path)
+    if size < offset:
+        offset = 0
+    n_bytes = size - offset
+    if max_bytes is not None:
+        n_bytes = min(n_bytes, max_bytes)
+    if n_bytes <= 0:
+        return [], offset
+
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(n_bytes)
+
+    end = data.rfind(b'\n') + 1
+    lines = data[:end].decode('utf-8', errors='replace').splitlines(True)
+    return lines, offset + end
+
+
 def read_foam_header(input_file):
 
     """
-    Extract the OpenFOAM header from input file
+    Extract the OpenFOAM header from input file. Files are only read up to
+    the end of the header.
 
     Inputs:
         - input_file: OF-input file path or list of file lines
@@ -74,15 +155,122 @@ def read_foam_header(input_file):
         - header: list of lines comprising the specific OF-file header
     """
 
-    input_list = convert_input_to_list(input_file)
     header = []
+    if isinstance(input_file, str):
+        with open(input_file, 'r', encoding='latin-1') as f:
+            for line in f:
+                header.append(line)
+                if re.search('^// *', line):
+                    break
+        return header
+
+    input_list = convert_input_to_list(input_file)
     for line in input_list:
         header.append(line)
-        if re.search('^// *') in line:
+        if re.search('^// *', line):
             break
     return header
 
 
+HEADER_PROBE_SIZE = 4096
+HEADER_MAX_SIZE = 65536
+re_foam_header = re.compile(r'\bFoamFile\s*\{([^}]*)\}')
+re_header_entry = re.compile(r'(\w+)\s+("[^"]*"|[^;]*?)\s*;')
+
+
+def probe_foam_header(file_path, probe_size=HEADER_PROBE_SIZE):
+
+    """
+    Parse the FoamFile dictionary of an OpenFOAM file by reading only the
+    first bytes of the file. Compressed files ending with .gz are supported.
+
+    Inputs:
+        - file_path: path of file
+        - probe_size: number of bytes read at first (default: 4096)
+    Returns:
+        - header: python dictionary with the FoamFile entries, e.g.
+                  {'version': '2.0', 'format': 'ascii',
+                   'class': 'volVectorField', 'object': 'U'},
+                  or None if the file has no OpenFOAM header
+    """
+
+    if file_path.endswith('.gz'):
+        import gzip
+        opener = gzip.open
+    else:
+        opener = open
+    try:
+        with opener(file_path, 'rb') as f:
+            data = f.read(probe_size)
+            if b'FoamFile' not in data:
+                return None
+            match = re_foam_header.search(data.decode('latin-1'))
+            while not match and len(data) < HEADER_MAX_SIZE:
+                more = f.read(len(data))
+                if not more:
+                    break
+                data += more
+                match = re_foam_header.search(data.decode('latin-1'))
+    except (OSError, EOFError):
+        return None
+    if not match:
+        return None
+    return parse_foam_header(match.group())
+
+
+def parse_foam_header(text):
+
+    """
+    Parse the FoamFile dictionary of the content of an OpenFOAM file
+
+    Inputs:
+        - text: file content as string
+    Returns:
+        - header: python dictionary with the FoamFile entries
+                  (see probe_foam_header) or None if there is no header
+    """
+
+    match = re_foam_header.search(text, 0, HEADER_MAX_SIZE)
+    if not match:
+        return None
+    content = re_comment.sub(' ', match.group(1))
+    return dict((key, value.strip('"'))
+                for key, value in re_header_entry.findall(content))
+
+
+def scan_foam_headers(root_dir, max_workers=8, skip_dirs=()):
+
+    """
+    Probe the headers of all files in a directory tree in parallel threads
+    and build an inventory of the OpenFOAM files
+
+    Inputs:
+        - root_dir: root directory of tree, e.g. a case directory
+        - max_workers: number of probing threads (default: 8)
+        - skip_dirs: names of directories not to descend into
+    Returns:
+        - inventory: list of python dictionaries, one per OpenFOAM file,
+                     with the file path as 'path', the file size as 'size'
+                     and the FoamFile entries (see probe_foam_header)
+    """
+
+    file_paths = []
+    for root, dirs, names in os.walk(root_dir):
+        dirs[:] = [name for name in dirs if name not in skip_dirs]
+        file_paths.extend(os.path.join(root, name) for name in names)
+
+    inventory = []
+    with ThreadPoolExecutor(max_workers) as executor:
+        headers = executor.map(probe_foam_header, file_paths)
+        for file_path, header in zip(file_paths, headers):
+            if header is not None:
+                item = {'path': file_path,
+                        'size': os.path.getsize(file_path)}
+                item.update(header)
+                inventory.append(item)
+    return inventory
+
+
 def read_first_dict(input_file):
 
     """ 
@@ -245,6 +433,244 @@ def read_transport_properties(input_file):
     return tp_dict
 
 
+re_comment = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+re_directive = re.compile(r'^[ \t]*#\w+[^\n]*', re.MULTILINE)
+re_token = re.compile(r'"(?:[^"\\]|\\.)*"|[{}();]|[^\s{}();"]+')
+re_list_start = re.compile(r'List<(\w+)>\s+(\d+)\s*\(')
+re_counted_list_start = re.compile(r'^[ \t]*(\d+)\s*\(', re.MULTILINE)
+re_binary_format = re.compile(r'\bformat\s+binary\s*;')
+
+# Item types of the top-level lists without keyword following the header
+# of files like polyMesh/points, polyMesh/faces or sets/<name> by class
+COUNTED_LIST_TYPES = {
+    'vectorField': ('vector',),
+    'scalarField': ('scalar',),
+    'labelList': ('label',),
+    'faceList': ('face',),
+    'faceCompactList': ('label', 'label'),
+    'cellSet': ('label',),
+    'faceSet': ('label',),
+    'pointSet': ('label',),
+}
+
+
+def find_list_end(text, start):
+
+    """
+    Find the closing bracket of an OpenFOAM list by counting brackets
+
+    Inputs:
+        - text: string containing the list
+        - start: position following the opening bracket of the list
+    Returns:
+        - end: position of the closing bracket or -1 if it was not found
+    """
+
+    depth = 1
+    for i in range(start, len(text)):
+        if text[i] == '(':
+            depth += 1
+        elif text[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def find_list_body_end(text, start, item_type, n_items, binary=False):
+
+    """
+    Find the closing bracket of an OpenFOAM list body with known length.
+    Ascii lists are searched for their closing bracket, the end of binary
+    lists is computed from the byte size of their items. For binary files,
+    the text must be decoded with a single-byte encoding (e.g. latin-1).
+
+    Inputs:
+        - text: content of an OpenFOAM file as string
+        - start: position following the opening bracket of the list
+        - item_type: OF type of the list items, e.g. 'scalar' or 'vector'
+        - n_items: number of list items
+        - binary: bool to indicate whether the file has binary format
+    Returns:
+        - end: position of the closing bracket or -1 if it was not found
+    """
+
+    n_components = gl.FOAM_COMPONENTS.get(item_type, 1)
+    if binary:
+        item_size = gl.FOAM_LABEL_SIZE if item_type == 'label' \
+            else gl.FOAM_SCALAR_SIZE
+        end = start + n_items * n_components * item_size
+        if end < len(text) and text[end] == ')':
+            return end
+        return -1
+    elif n_items == 0:
+        end = start
+    elif n_components == 1 and item_type != 'face':
+        end = text.find(')', start)
+    else:
+        end = text.find('\n)', start) + 1
+    if end <= 0 or end >= len(text) or text[end] != ')':
+        end = find_list_end(text, start)
+    return end
+
+
+def skip_list_bodies(text, binary=False, shifts=None, list_types=()):
+
+    """
+    Replace the bodies of nonuniform field lists by '...' so that entries of
+    large field files can be parsed without tokenizing every list item.
+
+    Inputs:
+        - text: content of an OpenFOAM file as string
+        - binary: bool to indicate whether the file has binary format
+        - shifts: list to which (position, shift) tuples are appended for
+                  each skipped body, with the position following the
+                  body in the returned text and the total number of
+                  characters removed up to there (default: None)
+        - list_types: item types of the consecutive top-level lists
+                      without keyword following the header, e.g.
+                      ('vector',) for polyMesh/points (default: (), none)
+    Returns:
+        - text: content with skipped list bodies
+    """
+
+    bodies = []
+    pos = 0
+    if list_types:
+        header = re_foam_header.search(text, 0, HEADER_MAX_SIZE)
+        pos = header.end() if header else 0
+        for item_type in list_types:
+            match = re_counted_list_start.search(text, pos)
+            if not match:
+                break
+            end = find_list_body_end(text, match.end(), item_type,
+                                     int(match.group(1)), binary)
+            if end < 0:
+                break
+            bodies.append((match.end(), end))
+            pos = end
+
+    match = re_list_start.search(text, pos)
+    while match:
+        end = find_list_body_end(text, match.end(), match.group(1),
+                                 int(match.group(2)), binary)
+        if end < 0:
+            break
+        bodies.append((match.end(), end))
+        pos = end
+        match = re_list_start.search(text, pos)
+
+    parts = []
+    pos = 0
+    removed = 0
+    for start, end in bodies:
+        parts.append(text[pos:start])
+        parts.append('...')
+        removed += end - start - 3
+        if shifts is not None:
+            shifts.append((end - removed, removed))
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def read_entries(input_file, spans=False):
+
+    """
+    Extract all entries of an OpenFOAM file with their dictionary path.
+    Comments and directives like #include are ignored and the bodies of
+    nonuniform lists and of the top-level lists of files like polyMesh/points
+    are replaced by '...'. Brackets directly following a keyword are part of
+    the key, e.g. div(phi,U) in fvSchemes.
+    Example: ('boundaryField/inlet', 'type', 'fixedValue')
+
+    Inputs:
+        - input_file: OF-input file path (may be compressed, see
+                      read_foam_text) or list of file lines
+        - spans: bool to indicate whether to return the positions of the
+                 values in the file content (default: False)
+    Returns:
+        - entries: list of tuples (dict_path, key, value) with dict_path
+                   as names of the enclosing dictionaries joined by '/'.
+                   If spans is True, the start and end position of the
+                   unmodified value in the file content are appended.
+    """
+
+    if isinstance(input_file, str):
+        text = read_foam_text(input_file)
+    else:
+        text = convert_input_to_str(input_file, '')
+    binary = re_binary_format.search(text, 0, 4096) is not None
+    header = parse_foam_header(text) or {}
+    shifts = []
+    text = skip_list_bodies(text, binary, shifts,
+                            COUNTED_LIST_TYPES.get(header.get('class'), ()))
+
+    # Blank out comments and directives keeping all positions unchanged
+    def blank(match):
+        return ' ' * len(match.group())
+    text = re_comment.sub(blank, text)
+    text = re_directive.sub(blank, text)
+
+    shift_positions = [position for position, shift in shifts]
+
+    def original_position(position):
+        i = bisect.bisect_right(shift_positions, position)
+        return position + shifts[i - 1][1] if i > 0 else position
+
+    entries = []
+    path = []
+    key = None
+    value_start = -1
+    key_end = 0
+    depth = 0
+    for match in re_token.finditer(text):
+        if match.start() < key_end:
+            continue
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        if depth > 0 or token == ')':
+            pass
+        elif token == '{':
+            path.append(key if key is not None else '')
+            key = None
+            continue
+        elif token == '}':
+            if path:
+                path.pop()
+            key = None
+            continue
+        elif token == ';':
+            if key is not None:
+                if value_start < 0:
+                    value_start = match.start()
+                value = text[value_start:match.start()]
+                entry = ('/'.join(path), key, ' '.join(value.split()))
+                if spans:
+                    end = len(value.rstrip()) + value_start
+                    entry += (original_position(value_start),
+                              original_position(end))
+                entries.append(entry)
+            key = None
+            continue
+        if key is None:
+            key = token.strip('"')
+            value_start = -1
+            if depth == 0 and token[0] not in '"()' \
+                    and text.startswith('(', match.end()):
+                # Keys like div(phi,U) or div((nuEff*dev2(T(grad(U)))))
+                end = find_list_end(text, match.end() + 1)
+                if end > 0:
+                    key_end = end + 1
+                    key = text[match.start():key_end]
+        elif value_start < 0:
+            value_start = match.start()
+    return entries
+
+
 def construct_foam_dict(in_dict):
 
     """
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+import os
+import subprocess
+import file_io_functions as fio
+import foam_field as ff
+
+
+class CaseFile:
+
+    """
+    Class holding the content of an OpenFOAM file of a case in memory.
+    Entries and the internalField can be read and modified, modifications
+    only mark the file as dirty and are written by FoamCase.flush.
+    Files stored compressed as file_path + '.gz' are written back
+    compressed to stored_path.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.stored_path = fio.resolve_foam_path(file_path)
+        self.text = ff.read_foam_text(self.stored_path)
+        self.dirty = False
+        self._entries = None
+
+    def __repr__(self):
+        return 'CaseFile({!r})'.format(self.file_path)
+
+    @property
+    def entries(self):
+
+        """
+        List of (dict_path, key, value, start, end) tuples of all entries,
+        see file_io_functions.read_entries
+        """
+
+        if self._entries is None:
+            self._entries = fio.read_entries([self.text], spans=True)
+        return self._entries
+
+    def _find_entry(self, key, dict_path):
+        for entry in self.entries:
+            if entry[0] == dict_path and entry[1] == key:
+                return entry
+        return None
+
+    def lookup_entry(self, key, dict_path=''):
+
+        """
+        Look up the value of an entry
+
+        Inputs:
+            - key: name of entry
+            - dict_path: names of the enclosing dictionaries joined by '/'
+                         (default: '', top level)
+        Returns:
+            - value: value string of the entry or None if not found
+        """
+
+        entry = self._find_entry(key, dict_path)
+        return entry[2] if entry else None
+
+    def set_entry(self, key, value, dict_path=''):
+
+        """
+        Set the value of an entry. Missing entries can only be added
+        at top level.
+
+        Inputs:
+            - key: name of entry
+            - value: new value string of the entry
+            - dict_path: names of the enclosing dictionaries joined by '/'
+                         (default: '', top level)
+        """
+
+        value = str(value)
+        entry = self._find_entry(key, dict_path)
+        if entry:
+            if entry[2] == ' '.join(value.split()):
+                return
+            self.set_text(self.text[:entry[3]] + value
+                          + self.text[entry[4]:])
+        elif dict_path == '':
+            self.set_text(self.text.rstrip('\n') + '\n\n'
+                          + key.ljust(16) + value + ';\n')
+        else:
+            raise KeyError('Entry ' + key + ' not found in dictionary '
+                           + dict_path + ' of ' + self.file_path)
+
+    def read_internal_field(self, n_cells=None):
+
+        """
+        Read the internalField values, see foam_field.read_internal_field
+        """
+
+        return ff.decode_internal_field(self.text, n_cells)
+
+    def write_internal_field(self, values):
+
+        """
+        Set the internalField values, see foam_field.write_internal_field
+        """
+
+        self.set_text(ff.encode_internal_field(self.text, values))
+
+    def set_text(self, text):
+        self.text = text
+        self.dirty = True
+        self._entries = None
+
+
+class CaseDir:
+
+    """
+    Class representing a directory of an OpenFOAM case, e.g. 0, constant or
+    system. Files are loaded as CaseFile objects on first access, either
+    as attribute or item: case_dir.U or case_dir['U']. Subdirectories like
+    constant/polyMesh are returned as CaseDir objects.
+    """
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        self.loaded = {}
+
+    def __repr__(self):
+        return 'CaseDir({!r})'.format(self.dir_path)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, name):
+        if name not in self.loaded:
+            path = os.path.join(self.dir_path, name)
+            if os.path.isdir(path):
+                self.loaded[name] = CaseDir(path)
+            elif os.path.isfile(path) or os.path.isfile(path + '.gz'):
+                self.loaded[name] = CaseFile(path)
+            else:
+                raise KeyError(name)
+        return self.loaded[name]
+
+    def __contains__(self, name):
+        return name in self.loaded \
+            or os.path.exists(os.path.join(self.dir_path, name))
+
+    def list(self):
+        return sorted(os.listdir(self.dir_path))
+
+    def loaded_files(self):
+
+        """
+        All CaseFile objects loaded so far in this directory and its
+        loaded subdirectories
+
+        Returns:
+            - files: list of CaseFile objects
+        """
+
+        files = []
+        for item in self.loaded.values():
+            if isinstance(item, CaseDir):
+                files.extend(item.loaded_files())
+            else:
+                files.append(item)
+        return files
+
+
+class FoamCase(CaseDir):
+
+    """
+    Class representing an OpenFOAM case directory. Directories and files
+    are loaded lazily on first access, e.g. case.constant.transportProperties
+    or case['0'].U, and modifications are kept in memory until flush writes
+    all modified files in one batch, e.g. right before a solver launch.
+    """
+
+    def __repr__(self):
+        return 'FoamCase({!r})'.format(self.dir_path)
+
+    def __getitem__(self, name):
+        # Allow paths like case['0/U']
+        item = self
+        for part in name.replace(os.sep, '/').split('/'):
+            item = CaseDir.__getitem__(item, part)
+        return item
+
+    @property
+    def times(self):
+
+        """
+        Sorted list of the names of all time directories of the case
+        """
+
+        times = []
+        for name in os.listdir(self.dir_path):
+            try:
+                float(name)
+            except ValueError:
+                continue
+            if os.path.isdir(os.path.join(self.dir_path, name)):
+                times.append(name)
+        return sorted(times, key=float)
+
+    @property
+    def latest_time(self):
+        times = self.times
+        return self[times[-1]] if times else None
+
+    def dirty_files(self):
+        return [item for item in self.loaded_files() if item.dirty]
+
+    def flush(self):
+
+        """
+        Write all modified files. All files are written to temporary files
+        first and only replace the original files once all of them were
+        written successfully, so that a failure while writing, e.g. a value
+        which cannot be encoded, leaves the case unchanged. The final
+        renames are atomic per file but not as a batch.
+
+        Returns:
+            - n_files: number of written files
+        """
+
+        dirty_files = self.dirty_files()
+        temp_paths = []
+        try:
+            for case_file in dirty_files:
+                temp_paths.append(case_file.stored_path + '.tmp')
+                ff.write_foam_temp(case_file.stored_path, case_file.text)
+        except BaseException:
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+        for case_file, temp_path in zip(dirty_files, temp_paths):
+            os.replace(temp_path, case_file.stored_path)
+            case_file.dirty = False
+        return len(dirty_files)
+
+    def discard(self):
+
+        """
+        Drop all loaded files including unflushed modifications,
+        so that they are read again on next access
+        """
+
+        self.loaded = {}
+
+    def run(self, command, **kwargs):
+
+        """
+        Flush all modifications and run a command, e.g. a solver, in the
+        case directory
+
+        Inputs:
+            - command: command as string or list of arguments
+            - kwargs: further keyword arguments of subprocess.run
+        Returns:
+            - result: subprocess.CompletedProcess object
+        """
+
+        self.flush()
+        return subprocess.run(command, cwd=self.dir_path,
+                              shell=isinstance(command, str), **kwargs)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import os
+import numpy as np
+from foam_field import BRACKET_TABLE
+from foam_log import AppendedFile, LogSeries
+
+def count_row_tokens(text):
+
+    """
+    Count the whitespace separated tokens of each line of a text. Control
+    characters are counted as whitespace like spaces, tabs and line breaks.
+
+    Inputs:
+        - text: rows joined into one string, each terminated by a line break
+    Returns:
+        - counts: array with the number of tokens per line
+    """
+
+    chars = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    if chars.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    space = chars <= ord(' ')
+    starts = ~space
+    starts[1:] &= space[:-1]
+    line_starts = np.concatenate(
+        ([0], np.flatnonzero(chars[:-1] == ord('\n')) + 1))
+    return np.add.reduceat(starts, line_starts, dtype=np.int64)
+
+
+def decode_rows(lines):
+
+    """
+    Decode data rows of an OpenFOAM postProcessing file into a 2D array.
+    Vector and tensor columns in round brackets are flattened into their
+    components. Comment lines starting with '#' and empty lines are skipped.
+
+    Inputs:
+        - lines: list of complete lines
+    Returns:
+        - data: 2D NumPy array with one row per data line
+    """
+
+    rows = [line for line in lines
+            if line.strip() and not line.lstrip().startswith('#')]
+    if not rows:
+        return np.empty((0, 0))
+    n_cols = len(rows[0].translate(BRACKET_TABLE).split())
+    text = ''.join(rows).translate(BRACKET_TABLE)
+    counts = count_row_tokens(text)
+    if len(counts) == len(rows) and np.all(counts == n_cols):
+        try:
+            values = np.array(text.split(), dtype=float)
+        except ValueError:
+            values = None
+        if values is not None:
+            return values.reshape(len(rows), n_cols)
+
+    # Slow path: skip rows which are malformed or differ in column count
+    data = []
+    for row in rows:
+        try:
+            values = [float(value)
+                      for value in row.translate(BRACKET_TABLE).split()]
+        except ValueError:
+            continue
+        if len(values) == n_cols:
+            data.append(values)
+    return np.array(data).reshape(-1, n_cols)
+
+
+class FoamDatFile(AppendedFile):
+
+    """
+    Class representing a single growing data file written by an OpenFOAM
+    function object, e.g. postProcessing/forces/0/forces.dat or
+    postProcessing/probes/0/p. The file is read incrementally, see
+    AppendedFile, so that each call to update only decodes the appended
+    rows and returns their number.
+    - header: list of comment lines preceding the data
+    - data: LogSeries table with the first column 'time' followed by the
+            flattened data columns
+    """
+
+    def reset(self):
+
+        """
+        Discard all decoded data and start reading from the beginning of file
+        """
+
+        super().reset()
+        self.header = []
+        self.data = None
+
+    @property
+    def values(self):
+        if self.data is None:
+            return np.empty((0, 0))
+        return self.data.values
+
+    def parse_lines(self, lines):
+
+        """
+        Decode data rows and append them to the stored table
+
+        Inputs:
+            - lines: list of complete lines
+        Returns:
+            - n_rows: number of new data rows
+        """
+
+        if self.data is None:
+            for line in lines:
+                if line.strip() and not line.lstrip().startswith('#'):
+                    break
+                self.header.append(line)
+        rows = decode_rows(lines)
+        if rows.size == 0:
+            return 0
+        if self.data is None:
+            columns = ['time'] + [str(i) for i in range(1, rows.shape[1])]
+            self.data = LogSeries(columns)
+        if rows.shape[1] != len(self.data.columns):
+            raise ValueError('Number of columns changed in file: '
+                             + self.file_path)
+        self.data.append(rows)
+        return len(rows)
+
+
+class FoamDatSeries:
+
+    """
+    Class combining the data files of one function object over all its time
+    directories, e.g. postProcessing/forces/<time>/forces.dat, into a single
+    time series. After a restart, the rows of earlier directories from the
+    restart time onwards are superseded by the later directory.
+    """
+
+    def __init__(self, function_dir, file_name):
+        self.function_dir = function_dir
+        self.file_name = file_name
+        self.files = {}
+
+    def find_time_dirs(self):
+
+        """
+        Find all time directories of the function object containing the
+        data file
+
+        Returns:
+            - time_dirs: list of directory names sorted by time value
+        """
+
+        time_dirs = []
+        for name in os.listdir(self.function_dir):
+            try:
+                float(name)
+            except ValueError:
+                continue
+            if os.path.isfile(os.path.join(self.function_dir, name,
+                                           self.file_name)):
+                time_dirs.append(name)
+        return sorted(time_dirs, key=float)
+
+    def update(self):
+
+        """
+        Discover new restart directories and decode the rows appended to all
+        data files since the last update
+
+        Returns:
+            - n_rows: number of new data rows
+        """
+
+        for time_dir in self.find_time_dirs():
+            if time_dir not in self.files:
+                file_path = os.path.join(self.function_dir, time_dir,
+                                         self.file_name)
+                self.files[time_dir] = FoamDatFile(file_path)
+        return sum(dat_file.update() for dat_file in self.files.values())
+
+    @property
+    def values(self):
+
+        """
+        Stitched data of all restart directories as 2D NumPy array with the
+        time in the first column
+        """
+
+        time_dirs = sorted(self.files, key=float)
+        blocks = []
+        for i, time_dir in enumerate(time_dirs):
+            values = self.files[time_dir].values
+            if values.size == 0:
+                continue
+            if i + 1 < len(time_dirs):
+                values = values[values[:, 0] < float(time_dirs[i + 1])]
+            blocks.append(values)
+        if not blocks:
+            return np.empty((0, 0))
+        return np.concatenate(blocks)
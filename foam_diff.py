@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import file_io_functions as fio
+import foam_field as ff
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_WORKERS = 8
+
+
+def hash_file(file_path):
+
+    """
+    Compute the content hash of a file
+
+    Inputs:
+        - file_path: path of file
+    Returns:
+        - digest: hexadecimal BLAKE2b digest of the file content
+    """
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+
+    """
+    Class caching file content hashes by path, modification time and size,
+    so that unmodified files are hashed only once. If a cache file path is
+    given, the cache is loaded from and saved to this JSON file.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.hashes = {}
+        if cache_path and os.path.isfile(cache_path):
+            with open(cache_path, 'r') as f:
+                self.hashes = json.load(f)
+
+    def save(self):
+        if self.cache_path:
+            with open(self.cache_path, 'w') as f:
+                json.dump(self.hashes, f)
+
+    def get_hashes(self, file_paths, max_workers=MAX_WORKERS):
+
+        """
+        Get the content hashes of files, hashing uncached or modified
+        files in parallel threads
+
+        Inputs:
+            - file_paths: list of file paths
+            - max_workers: number of hashing threads (default: MAX_WORKERS)
+        Returns:
+            - hashes: python dictionary with file paths as keys
+                      and hexadecimal digests as values
+        """
+
+        hashes = {}
+        missing = []
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            stat = os.stat(key)
+            cached = self.hashes.get(key)
+            if cached and cached[0] == stat.st_mtime_ns \
+                    and cached[1] == stat.st_size:
+                hashes[file_path] = cached[2]
+            else:
+                missing.append((file_path, key, stat))
+        with ThreadPoolExecutor(max_workers) as executor:
+            digests = executor.map(hash_file, [item[1] for item in missing])
+            for (file_path, key, stat), digest in zip(missing, digests):
+                self.hashes[key] = [stat.st_mtime_ns, stat.st_size, digest]
+                hashes[file_path] = digest
+        return hashes
+
+
+def list_files(root_dir):
+
+    """
+    List all files of a directory tree
+
+    Inputs:
+        - root_dir: root directory of tree
+    Returns:
+        - files: python dictionary with paths relative to root_dir as keys
+                 and file sizes as values
+    """
+
+    files = {}
+    for root, dirs, names in os.walk(root_dir):
+        for name in names:
+            file_path = os.path.join(root, name)
+            files[os.path.relpath(file_path, root_dir)] = \
+                os.path.getsize(file_path)
+    return files
+
+
+def number_entries(entries):
+
+    """
+    Key entries by their dictionary path, key and occurrence, so that
+    repeated entries of the same key are kept
+
+    Inputs:
+        - entries: list of (dict_path, key, value) tuples, see read_entries
+    Returns:
+        - entries: python dictionary with (dict_path, key, occurrence)
+                   tuples as keys and values as values, with occurrence
+                   counting the previous entries of the same key
+    """
+
+    numbered = {}
+    counts = {}
+    for path, key, value in entries:
+        occurrence = counts.get((path, key), 0)
+        counts[(path, key)] = occurrence + 1
+        numbered[(path, key, occurrence)] = value
+    return numbered
+
+
+def diff_entries(text_a, text_b):
+
+    """
+    Compare the entries of two OpenFOAM files
+
+    Inputs:
+        - text_a: content of first file as string
+        - text_b: content of second file as string
+    Returns:
+        - entries: python dictionary with (dict_path, key, occurrence)
+                   tuples as keys (see number_entries) and
+                   (value_a, value_b) tuples as values, with None for
+                   entries missing in one file
+    """
+
+    entries_a = number_entries(fio.read_entries([text_a]))
+    entries_b = number_entries(fio.read_entries([text_b]))
+    entries = {}
+    for key in entries_a.keys() | entries_b.keys():
+        value_a = entries_a.get(key)
+        value_b = entries_b.get(key)
+        if value_a != value_b:
+            entries[key] = (value_a, value_b)
+    return entries
+
+
+def diff_internal_fields(text_a, text_b):
+
+    """
+    Compare the internalField values of two OpenFOAM field files
+
+    Inputs:
+        - text_a: content of first field file as string
+        - text_b: content of second field file as string
+    Returns:
+        - stats: python dictionary with the maximum ('max') and mean
+                 ('mean') absolute difference of all value components or
+                 None if the fields are not comparable
+    """
+
+    try:
+        values_a = ff.decode_internal_field(text_a)
+        values_b = ff.decode_internal_field(text_b)
+    except ValueError:
+        return None
+    if np.ndim(values_a) > np.ndim(values_b):
+        values_b = np.broadcast_to(values_b, np.shape(values_a))
+    elif np.ndim(values_b) > np.ndim(values_a):
+        values_a = np.broadcast_to(values_a, np.shape(values_b))
+    if np.shape(values_a) != np.shape(values_b):
+        return None
+    difference = np.abs(np.asarray(values_a) - np.asarray(values_b))
+    if difference.size == 0:
+        return {'max': 0.0, 'mean': 0.0}
+    return {'max': float(difference.max()),
+            'mean': float(difference.mean())}
+
+
+def diff_cases(dir_a, dir_b, hash_cache=None, compare_fields=True):
+
+    """
+    Compare two case or time directories. Files of equal size are compared
+    by their (cached) content hashes, files with different content are
+    read once and compared entry by entry and by the values of their
+    internalField.
+
+    Inputs:
+        - dir_a: path of first directory
+        - dir_b: path of second directory
+        - hash_cache: HashCache object to reuse hashes across calls
+                      (default: None, a temporary cache is used)
+        - compare_fields: bool to indicate whether to compare the
+                          internalField values of changed files
+    Returns:
+        - diff: python dictionary containing the following keys, values:
+            - only_a: sorted list of files only found in dir_a
+            - only_b: sorted list of files only found in dir_b
+            - identical: sorted list of files with identical content
+            - changed: python dictionary with the relative paths of changed
+                       files as keys and dictionaries with the keys
+                       'entries' (see diff_entries) and 'internalField'
+                       (see diff_internal_fields) as values, both None
+                       for files which are not OpenFOAM files
+    """
+
+    if hash_cache is None:
+        hash_cache = HashCache()
+    files_a = list_files(dir_a)
+    files_b = list_files(dir_b)
+    common = sorted(files_a.keys() & files_b.keys())
+
+    # Files of different size differ, equal sized files are hashed
+    same_size = [name for name in common if files_a[name] == files_b[name]]
+    hashes = hash_cache.get_hashes(
+        [os.path.join(dir_a, name) for name in same_size]
+        + [os.path.join(dir_b, name) for name in same_size])
+    identical = [name for name in same_size
+                 if hashes[os.path.join(dir_a, name)]
+                 == hashes[os.path.join(dir_b, name)]]
+
+    changed = {}
+    identical_set = set(identical)
+    for name in common:
+        if name in identical_set:
+            continue
+        text_a = ff.read_foam_text(os.path.join(dir_a, name))
+        text_b = ff.read_foam_text(os.path.join(dir_b, name))
+        changes = {'entries': None, 'internalField': None}
+        if fio.parse_foam_header(text_a) is not None \
+                and fio.parse_foam_header(text_b) is not None:
+            changes['entries'] = diff_entries(text_a, text_b)
+            if compare_fields:
+                changes['internalField'] = \
+                    diff_internal_fields(text_a, text_b)
+        changed[name] = changes
+
+    return {'only_a': sorted(files_a.keys() - files_b.keys()),
+            'only_b': sorted(files_b.keys() - files_a.keys()),
+            'identical': identical,
+            'changed': changed}
@@ -0,0 +1,594 @@
+#!/usr/bin/env python
+
+import os
+import re
+import mmap
+from collections import OrderedDict
+import numpy as np
+import globals as gl
+import file_io_functions as fio
+
+# Translation table removing the brackets of vector and tensor items
+BRACKET_TABLE = str.maketrans('()', '  ')
+
+# Significant digits of ascii field values and rows formatted per chunk
+WRITE_PRECISION = 12
+WRITE_CHUNK_SIZE = 1000000
+
+# Bytes read to locate the internalField and per chunk when indexing lines
+HEAD_SIZE = 65536
+INDEX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Line indexes of ascii internalField list bodies cached by file path,
+# least recently used indexes are dropped beyond LINE_INDEX_CACHE_SIZE
+LINE_INDEX_CACHE_SIZE = 4
+_line_indexes = OrderedDict()
+
+# Item types of fields by number of components
+FOAM_TYPES = {1: 'scalar', 3: 'vector', 6: 'symmTensor', 9: 'tensor'}
+
+re_internal_field = re.compile(r'^[ \t]*internalField\s+', re.MULTILINE)
+re_nonuniform = re.compile(r'\s*nonuniform\s+List<(\w+)>\s*(\d+)\s*\(')
+re_uniform = re.compile(r'\s*uniform\s+([^;]*);')
+
+
+def read_foam_text(file_path):
+
+    """
+    Read an OpenFOAM file as text, see file_io_functions.read_foam_text
+    """
+
+    return fio.read_foam_text(file_path)
+
+
+def is_binary(text):
+    return fio.re_binary_format.search(text, 0, 4096) is not None
+
+
+def decode_list(body, item_type, n_items, binary=False):
+
+    """
+    Decode the body of an OpenFOAM list, i.e. the content between its
+    opening and closing bracket, into a NumPy array
+
+    Inputs:
+        - body: list body as string (latin-1 decoded for binary lists)
+        - item_type: OF type of the list items, e.g. 'scalar' or 'label'
+        - n_items: number of list items
+        - binary: bool to indicate whether the list has binary format
+    Returns:
+        - values: array of shape (n_items,) for scalars and labels or
+                  (n_items, n_components) otherwise
+    """
+
+    n_components = gl.FOAM_COMPONENTS.get(item_type, 1)
+    if item_type == 'label':
+        dtype = np.int32 if binary else np.int64
+    else:
+        dtype = np.float64
+    if binary:
+        values = np.frombuffer(body.encode('latin-1'),
+                               dtype=np.dtype(dtype).newbyteorder('<'))
+    else:
+        values = np.fromstring(body.translate(BRACKET_TABLE),
+                               dtype=dtype, sep=' ')
+    if values.size != n_items * n_components:
+        raise ValueError('List body does not contain {} items of type {}'
+                         .format(n_items, item_type))
+    if n_components == 1:
+        return values
+    return values.reshape(n_items, n_components)
+
+
+def encode_list(values, binary=False):
+
+    """
+    Encode a NumPy array into the body of an OpenFOAM list
+
+    Inputs:
+        - values: array of shape (n_items,) or (n_items, n_components)
+        - binary: bool to indicate whether to encode in binary format
+    Returns:
+        - body: list body as string (latin-1 decoded for binary lists)
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if binary:
+        return values.astype('<f8').tobytes().decode('latin-1')
+    if values.ndim == 1:
+        row_format = '%.{}g\n'.format(WRITE_PRECISION)
+    else:
+        row_format = '(' + ' '.join(['%.{}g'.format(WRITE_PRECISION)]
+                                    * values.shape[1]) + ')\n'
+    parts = ['\n']
+    for i in range(0, len(values), WRITE_CHUNK_SIZE):
+        chunk = values[i:i + WRITE_CHUNK_SIZE]
+        parts.append((row_format * len(chunk)) % tuple(chunk.ravel()))
+    return ''.join(parts)
+
+
+def find_internal_field(text):
+
+    """
+    Locate the value of the internalField entry of a field file
+
+    Inputs:
+        - text: content of the field file as string
+    Returns:
+        - start: position of the value following the internalField keyword
+        - end: position of the semicolon terminating the entry
+        - match: match object of either the uniform or nonuniform pattern
+    """
+
+    keyword = re_internal_field.search(text)
+    if not keyword:
+        raise ValueError('No internalField entry found')
+    start = keyword.end()
+    match = re_nonuniform.match(text, start)
+    if match:
+        end = fio.find_list_body_end(text, match.end(), match.group(1),
+                                     int(match.group(2)), is_binary(text))
+        if end < 0:
+            raise ValueError('End of internalField list not found')
+        end = text.find(';', end)
+    else:
+        match = re_uniform.match(text, start)
+        if not match:
+            raise ValueError('internalField is neither uniform '
+                             'nor nonuniform list')
+        end = match.end() - 1
+    return start, end, match
+
+
+def decode_internal_field(text, n_cells=None):
+
+    """
+    Decode the internalField of the content of a field file
+
+    Inputs:
+        - text: content of the field file as string
+        - n_cells: number of cells to expand uniform values to
+                   (default: None, uniform values are returned unexpanded)
+    Returns:
+        - values: array of shape (n_cells,) for scalar fields or
+                  (n_cells, n_components) otherwise
+    """
+
+    start, end, match = find_internal_field(text)
+    if match.re is re_nonuniform:
+        return decode_list(text[match.end():end].rsplit(')', 1)[0],
+                           match.group(1), int(match.group(2)),
+                           is_binary(text))
+    value = np.array(match.group(1).translate(BRACKET_TABLE).split(),
+                     dtype=np.float64)
+    if len(value) == 1:
+        value = value[0]
+    if n_cells is None:
+        return value
+    return np.tile(value, (n_cells, 1)) if np.ndim(value) \
+        else np.full(n_cells, value)
+
+
+def encode_internal_field(text, values):
+
+    """
+    Replace the internalField of the content of a field file by nonuniform
+    values in the format (ascii or binary) of the file
+
+    Inputs:
+        - text: content of the field file as string
+        - values: array of shape (n_cells,) for scalar fields or
+                  (n_cells, n_components) otherwise
+    Returns:
+        - text: content with the new internalField
+    """
+
+    values = np.asarray(values)
+    n_components = 1 if values.ndim == 1 else values.shape[1]
+    if n_components not in FOAM_TYPES:
+        raise ValueError('Field values must have 1, 3, 6 or 9 components')
+
+    start, end, match = find_internal_field(text)
+    value_str = 'nonuniform List<{}> \n{}\n({})\n'.format(
+        FOAM_TYPES[n_components], len(values),
+        encode_list(values, is_binary(text)))
+    return text[:start] + value_str + text[end:]
+
+
+def write_foam_temp(file_path, text):
+
+    """
+    Write the content of an OpenFOAM file to the temporary file
+    file_path + '.tmp', compressed if file_path ends with .gz
+
+    Inputs:
+        - file_path: path of OF-file
+        - text: file content as string (latin-1 decoded)
+    Returns:
+        - temp_path: path of the temporary file
+    """
+
+    temp_path = file_path + '.tmp'
+    if file_path.endswith('.gz'):
+        import gzip
+        with gzip.open(temp_path, 'wt', encoding='latin-1',
+                       newline='') as f:
+            f.write(text)
+    else:
+        with open(temp_path, 'w', encoding='latin-1', newline='') as f:
+            f.write(text)
+    return temp_path
+
+
+def write_foam_text(file_path, text):
+
+    """
+    Write the content of an OpenFOAM file atomically by writing a
+    temporary file first, so that readers never see a partial file.
+    A file stored compressed as file_path + '.gz' is written back
+    compressed to file_path + '.gz'.
+
+    Inputs:
+        - file_path: path of OF-file
+        - text: file content as string (latin-1 decoded)
+    """
+
+    file_path = fio.resolve_foam_path(file_path)
+    os.replace(write_foam_temp(file_path, text), file_path)
+
+
+def read_internal_field(file_path, n_cells=None):
+
+    """
+    Read the internalField of an OpenFOAM field file into a NumPy array
+
+    Inputs:
+        - file_path: path of field file
+        - n_cells: number of cells to expand uniform values to
+                   (default: None, uniform values are returned unexpanded)
+    Returns:
+        - values: array of shape (n_cells,) for scalar fields or
+                  (n_cells, n_components) otherwise
+    """
+
+    return decode_internal_field(read_foam_text(file_path), n_cells)
+
+
+def write_internal_field(file_path, values):
+
+    """
+    Write values as nonuniform internalField to an OpenFOAM field file in
+    the format (ascii or binary) of the file. The file is replaced
+    atomically, so that readers never see a partially written field.
+
+    Inputs:
+        - file_path: path of field file
+        - values: array of shape (n_cells,) for scalar fields or
+                  (n_cells, n_components) otherwise
+    """
+
+    text = encode_internal_field(read_foam_text(file_path), values)
+    write_foam_text(file_path, text)
+
+
+def locate_internal_field_body(file_path):
+
+    """
+    Locate the internalField list body of a field file by reading only the
+    beginning of the file, which contains the header, the dimensions and
+    the start of the internalField
+
+    Inputs:
+        - file_path: path of field file
+    Returns:
+        - location: python dictionary with the keys 'type', 'n_items',
+                    'start' (byte offset following the opening bracket)
+                    and 'binary' for nonuniform fields, or with the key
+                    'uniform' containing the value string for uniform
+                    fields, or None if the internalField was not found
+    """
+
+    with open(file_path, 'rb') as f:
+        text = f.read(HEAD_SIZE).decode('latin-1')
+    keyword = re_internal_field.search(text)
+    if not keyword:
+        return None
+    match = re_nonuniform.match(text, keyword.end())
+    if match:
+        return {'type': match.group(1), 'n_items': int(match.group(2)),
+                'start': match.end(), 'binary': is_binary(text)}
+    match = re_uniform.match(text, keyword.end())
+    if match:
+        return {'uniform': match.group(1)}
+    return None
+
+
+def build_line_index(file_path, location):
+
+    """
+    Build the byte offsets of the lines of an ascii internalField list body
+    with one item per line, as written by OpenFOAM for nonuniform lists
+
+    Inputs:
+        - file_path: path of field file
+        - location: body location, see locate_internal_field_body
+    Returns:
+        - offsets: array of n_items + 1 byte offsets of the line breaks
+                   enclosing the items, i.e. item i is found between
+                   offsets[i] + 1 and offsets[i + 1], or None if the list
+                   body does not contain one item per line
+    """
+
+    n_offsets = location['n_items'] + 1
+    parts = []
+    count = 0
+    position = location['start']
+    with open(file_path, 'rb') as f:
+        f.seek(position)
+        head = f.read(64)
+        f.seek(position)
+        while count < n_offsets:
+            chunk = f.read(INDEX_CHUNK_SIZE)
+            if not chunk:
+                return None
+            breaks = np.flatnonzero(
+                np.frombuffer(chunk, dtype=np.uint8) == ord('\n'))
+            parts.append(breaks[:n_offsets - count] + position)
+            count += len(parts[-1])
+            position += len(chunk)
+        offsets = np.concatenate(parts)
+        f.seek(int(offsets[-1]))
+        tail = f.read(64)
+
+    # Only whitespace may precede the first and follow the last item
+    if head[:offsets[0] - location['start']].strip() \
+            or not tail.strip().startswith(b')'):
+        return None
+    return offsets
+
+
+def load_line_index(file_path, location, index_path=None):
+
+    """
+    Get the line index of an ascii internalField list body. The indexes of
+    the last LINE_INDEX_CACHE_SIZE files are cached in memory and, if
+    index_path is given, persisted as NumPy .npz file. Cached indexes are
+    rebuilt if the field file was modified.
+
+    Inputs:
+        - file_path: path of field file
+        - location: body location, see locate_internal_field_body
+        - index_path: path of the persisted index file (default: None)
+    Returns:
+        - offsets: see build_line_index
+    """
+
+    stat = os.stat(file_path)
+    key = os.path.abspath(file_path)
+    state = (stat.st_mtime_ns, stat.st_size)
+    cached = _line_indexes.get(key)
+    if cached is not None and cached[0] == state:
+        _line_indexes.move_to_end(key)
+        return cached[1]
+
+    offsets = None
+    if index_path and os.path.isfile(index_path):
+        with np.load(index_path) as index:
+            if int(index['mtime_ns']) == stat.st_mtime_ns \
+                    and int(index['size']) == stat.st_size:
+                offsets = index['offsets']
+    if offsets is None:
+        offsets = build_line_index(file_path, location)
+        if offsets is None:
+            return None
+        if index_path:
+            with open(index_path, 'wb') as f:
+                np.savez(f, offsets=offsets, mtime_ns=stat.st_mtime_ns,
+                         size=stat.st_size)
+    _line_indexes[key] = (state, offsets)
+    _line_indexes.move_to_end(key)
+    while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+        _line_indexes.popitem(last=False)
+    return offsets
+
+
+def read_subset_completely(file_path, cells):
+
+    """
+    Read the internalField values of selected cells by decoding the whole
+    field, see read_internal_field_subset
+    """
+
+    text = read_foam_text(file_path)
+    start, end, match = find_internal_field(text)
+    if match.re is re_nonuniform:
+        return decode_internal_field(text)[cells]
+    return decode_internal_field(text, len(cells))
+
+
+def read_internal_field_subset(file_path, cells, index_path=None):
+
+    """
+    Read the internalField values of selected cells, e.g. of a cell zone or
+    cell set, without decoding the whole field. Binary fields are accessed
+    at the byte offsets computed from the cell labels, ascii fields via a
+    line index (see load_line_index). Fields which can be accessed neither
+    way, e.g. compressed files, are read completely.
+
+    Inputs:
+        - file_path: path of field file
+        - cells: array of cell labels
+        - index_path: path of the persisted line index of ascii fields
+                      (default: None, the index is only cached in memory)
+    Returns:
+        - values: array of shape (n_selected,) for scalar fields or
+                  (n_selected, n_components) otherwise, in order of cells
+    """
+
+    cells = np.asarray(cells, dtype=np.int64)
+    location = None
+    if os.path.isfile(file_path):
+        location = locate_internal_field_body(file_path)
+    if location is None:
+        return read_subset_completely(file_path, cells)
+    if 'uniform' in location:
+        value = np.array(location['uniform'].translate(BRACKET_TABLE)
+                         .split(), dtype=np.float64)
+        return np.tile(value, (len(cells), 1)) if len(value) > 1 \
+            else np.full(len(cells), value[0])
+
+    item_type = location['type']
+    n_components = gl.FOAM_COMPONENTS.get(item_type, 1)
+    if len(cells) == 0:
+        return np.empty((0,) if n_components == 1 else (0, n_components))
+    if cells.min() < 0 or cells.max() >= location['n_items']:
+        raise IndexError('Cell labels exceed the field size of '
+                         + str(location['n_items']))
+
+    if location['binary']:
+        values = np.memmap(file_path, dtype='<f8', mode='r',
+                           offset=location['start'],
+                           shape=(location['n_items'], n_components))
+        values = np.array(values[cells])
+        return values[:, 0] if n_components == 1 else values
+
+    offsets = load_line_index(file_path, location, index_path)
+    if offsets is None:
+        return read_subset_completely(file_path, cells)
+
+    # Read contiguous runs of sorted unique cells as single blocks
+    unique_cells, inverse = np.unique(cells, return_inverse=True)
+    run_starts = np.flatnonzero(np.diff(unique_cells, prepend=-2) != 1)
+    run_ends = np.append(run_starts[1:], len(unique_cells))
+    blocks = []
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for first, last in zip(unique_cells[run_starts],
+                                   unique_cells[run_ends - 1]):
+                blocks.append(data[offsets[first]:offsets[last + 1]])
+    values = decode_list(b''.join(blocks).decode('latin-1'), item_type,
+                         len(unique_cells))
+    return values[inverse]
+
+
+def select_box(centres, box_min, box_max):
+
+    """
+    Select the cells with centres inside an axis-aligned box
+
+    Inputs:
+        - centres: cell centre array of shape (n_cells, 3)
+        - box_min: minimum corner of box as sequence (x, y, z)
+        - box_max: maximum corner of box as sequence (x, y, z)
+    Returns:
+        - mask: boolean array of shape (n_cells,)
+    """
+
+    return np.all((centres >= box_min) & (centres <= box_max), axis=1)
+
+
+def select_sphere(centres, centre, radius):
+
+    """
+    Select the cells with centres inside a sphere
+
+    Inputs:
+        - centres: cell centre array of shape (n_cells, 3)
+        - centre: centre of sphere as sequence (x, y, z)
+        - radius: radius of sphere
+    Returns:
+        - mask: boolean array of shape (n_cells,)
+    """
+
+    distance = centres - np.asarray(centre)
+    return np.einsum('ij,ij->i', distance, distance) <= radius ** 2
+
+
+def select_cylinder(centres, point1, point2, radius):
+
+    """
+    Select the cells with centres inside a finite cylinder
+
+    Inputs:
+        - centres: cell centre array of shape (n_cells, 3)
+        - point1: centre of first end face as sequence (x, y, z)
+        - point2: centre of second end face as sequence (x, y, z)
+        - radius: radius of cylinder
+    Returns:
+        - mask: boolean array of shape (n_cells,)
+    """
+
+    point1 = np.asarray(point1, dtype=np.float64)
+    axis = np.asarray(point2, dtype=np.float64) - point1
+    length = np.linalg.norm(axis)
+    axis /= length
+    distance = centres - point1
+    axial = distance @ axis
+    radial = distance - np.outer(axial, axis)
+    return (axial >= 0.0) & (axial <= length) \
+        & (np.einsum('ij,ij->i', radial, radial) <= radius ** 2)
+
+
+def select_expression(centres, expression):
+
+    """
+    Select the cells with an arbitrary NumPy expression of the cell centre
+    coordinates x, y and z, e.g. '(x > 0.5) & (y**2 + z**2 < 0.01)'.
+    The expression may use the NumPy module as np.
+
+    Inputs:
+        - centres: cell centre array of shape (n_cells, 3)
+        - expression: expression string or callable taking the centres
+    Returns:
+        - mask: boolean array of shape (n_cells,)
+    """
+
+    if callable(expression):
+        mask = expression(centres)
+    else:
+        names = {'x': centres[:, 0], 'y': centres[:, 1],
+                 'z': centres[:, 2], 'np': np}
+        mask = eval(expression, {'__builtins__': {}}, names)
+    return np.broadcast_to(np.asarray(mask, dtype=bool), len(centres))
+
+
+def set_fields(file_path, centres, selections, default=None):
+
+    """
+    Initialize the internalField of a field file by regions, similar to the
+    setFields utility. Later selections overwrite earlier ones.
+    Example: set_fields('0/alpha.water', centres,
+                        [(select_box(centres, (0, 0, 0), (1, 1, 1)), 1.0)],
+                        default=0.0)
+
+    Inputs:
+        - file_path: path of field file
+        - centres: cell centre array of shape (n_cells, 3)
+        - selections: list of (selection, value) tuples with the selection
+                      as boolean mask, expression string or callable
+                      (see select_expression)
+        - default: value of cells outside of all selections
+                   (default: None, keep the current values)
+    Returns:
+        - values: the written field values
+    """
+
+    n_cells = len(centres)
+    if default is None:
+        values = np.array(read_internal_field(file_path, n_cells),
+                          dtype=np.float64)
+    else:
+        default = np.asarray(default, dtype=np.float64)
+        values = np.tile(default, (n_cells, 1)) if default.ndim \
+            else np.full(n_cells, float(default))
+    if len(values) != n_cells:
+        raise ValueError('Number of field values does not match '
+                         'the number of cells')
+    for selection, value in selections:
+        if isinstance(selection, np.ndarray) and selection.dtype == bool:
+            mask = selection
+        else:
+            mask = select_expression(centres, selection)
+        values[mask] = value
+    write_internal_field(file_path, values)
+    return values
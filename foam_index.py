@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+import os
+import sqlite3
+import file_io_functions as fio
+
+
+class FoamIndex:
+
+    """
+    Class maintaining a persistent inverted index of the entries of all
+    OpenFOAM files in one or more case trees. The entries are stored as
+    (file, dict_path, key, value) rows in a SQLite database, e.g.
+    ('case/0/U', 'boundaryField/inlet', 'type', 'fixedValue'), so that
+    cross-file queries do not require parsing the files again. Updates only
+    parse files which were added or modified since the last update.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            mtime REAL,
+            size INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            path TEXT,
+            dict_path TEXT,
+            key TEXT,
+            value TEXT
+        );
+        CREATE INDEX IF NOT EXISTS entries_key_value
+            ON entries (key, value);
+        CREATE INDEX IF NOT EXISTS entries_dict_path_key
+            ON entries (dict_path, key);
+        CREATE INDEX IF NOT EXISTS entries_path ON entries (path);
+    """
+
+    # Directories not containing case setup files
+    SKIP_DIRS = ('postProcessing', 'dynamicCode')
+    SKIP_PREFIXES = ('processor', '.')
+    PROBE_SIZE = 4096
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def is_foam_file(cls, file_path):
+
+        """
+        Check whether the file starts with an OpenFOAM header
+
+        Inputs:
+            - file_path: path of file to check
+        Returns:
+            - bool to indicate whether the FoamFile header was found
+        """
+
+        return fio.probe_foam_header(file_path, cls.PROBE_SIZE) is not None
+
+    @classmethod
+    def find_files(cls, case_dir):
+
+        """
+        Find all OpenFOAM files in a case tree
+
+        Inputs:
+            - case_dir: root directory of the case tree
+        Returns:
+            - files: python dictionary with absolute file paths as keys and
+                     (mtime, size) tuples as values
+        """
+
+        files = {}
+        for root, dirs, names in os.walk(os.path.abspath(case_dir)):
+            dirs[:] = [name for name in dirs if name not in cls.SKIP_DIRS
+                       and not name.startswith(cls.SKIP_PREFIXES)]
+            for name in names:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                files[file_path] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def update(self, case_dirs):
+
+        """
+        Update the index for the provided case trees. Files which were not
+        modified since the last update are skipped and files which were
+        removed are dropped from the index.
+
+        Inputs:
+            - case_dirs: case tree root directory or list of directories
+        Returns:
+            - n_files: number of (re)indexed files
+        """
+
+        if isinstance(case_dirs, str):
+            case_dirs = [case_dirs]
+        cursor = self.connection.cursor()
+        n_files = 0
+        for case_dir in case_dirs:
+            root = os.path.join(os.path.abspath(case_dir), '')
+            indexed = dict(
+                (path, (mtime, size)) for path, mtime, size in
+                cursor.execute('SELECT path, mtime, size FROM files '
+                               'WHERE substr(path, 1, ?) = ?',
+                               (len(root), root)))
+            files = self.find_files(case_dir)
+
+            removed = [(path,) for path in indexed if path not in files]
+            cursor.executemany('DELETE FROM entries WHERE path = ?', removed)
+            cursor.executemany('DELETE FROM files WHERE path = ?', removed)
+
+            for file_path, stat in files.items():
+                if indexed.get(file_path) == stat:
+                    continue
+                cursor.execute('DELETE FROM entries WHERE path = ?',
+                               (file_path,))
+                cursor.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)',
+                               (file_path,) + stat)
+                if not self.is_foam_file(file_path):
+                    continue
+                try:
+                    entries = fio.read_entries(file_path)
+                except OSError:
+                    continue
+                cursor.executemany(
+                    'INSERT INTO entries VALUES (?, ?, ?, ?)',
+                    [(file_path,) + entry for entry in entries])
+                n_files += 1
+        self.connection.commit()
+        return n_files
+
+    def query(self, key=None, value=None, dict_path=None, path=None):
+
+        """
+        Find indexed entries. Each argument is matched as SQLite GLOB
+        pattern, i.e. exactly unless it contains wildcards like '*'.
+        Example: query(dict_path='boundaryField/inlet', key='type',
+                       value='fixedValue')
+
+        Inputs:
+            - key: pattern of entry keys (default: None, any)
+            - value: pattern of entry values (default: None, any)
+            - dict_path: pattern of dictionary paths (default: None, any)
+            - path: pattern of file paths (default: None, any)
+        Returns:
+            - entries: list of tuples (path, dict_path, key, value)
+        """
+
+        conditions = []
+        params = []
+        for column, pattern in (('key', key), ('value', value),
+                                ('dict_path', dict_path), ('path', path)):
+            if pattern is not None:
+                conditions.append(column + ' GLOB ?')
+                params.append(pattern)
+        sql = 'SELECT path, dict_path, key, value FROM entries'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        return self.connection.execute(sql, params).fetchall()
+
+    def find_files_with(self, key=None, value=None, dict_path=None,
+                        path=None):
+
+        """
+        Find the files containing matching entries,
+        see query for the arguments
+
+        Returns:
+            - paths: sorted list of file paths
+        """
+
+        return sorted(set(entry[0] for entry in
+                          self.query(key, value, dict_path, path)))
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+import re
+import numpy as np
+import globals as gl
+import file_io_functions as fio
+
+NUM = '(' + gl.num_pattern + ')'
+
+
+class LogSeries:
+
+    """
+    Table of named numerical columns which grows by appending rows. Storage
+    is allocated in blocks of doubling size, so that appending rows during
+    repeated incremental reads does not copy the whole table every time.
+    Columns are returned as NumPy array views of the filled rows.
+    Example: series['time'], series['initial']
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.size = 0
+        self._data = np.empty((self.INITIAL_CAPACITY, len(self.columns)))
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, column):
+        return self._data[:self.size, self.columns.index(column)]
+
+    @property
+    def values(self):
+        return self._data[:self.size]
+
+    def append(self, rows):
+
+        """
+        Append rows to the table
+
+        Inputs:
+            - rows: list of tuples or 2D array with one value for each column
+        """
+
+        if len(rows) == 0:
+            return
+        new_size = self.size + len(rows)
+        if new_size > len(self._data):
+            capacity = len(self._data)
+            while capacity < new_size:
+                capacity *= 2
+            data = np.empty((capacity, len(self.columns)))
+            data[:self.size] = self._data[:self.size]
+            self._data = data
+        self._data[self.size:new_size] = rows
+        self.size = new_size
+
+    def to_dict(self):
+        return {column: self[column] for column in self.columns}
+
+
+class AppendedFile:
+
+    """
+    Base class of growing text files which are read incrementally: the byte
+    offset of the last complete line is stored and each call to update only
+    passes the lines appended since to parse_lines. If the file was
+    truncated or rewritten, e.g. by a solver restart, all data is reset and
+    the file is read again from the beginning. Subclasses extend reset and
+    implement parse_lines.
+    """
+
+    CHUNK_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.reset()
+
+    def reset(self):
+
+        """
+        Discard all parsed data and start reading from the beginning of file
+        """
+
+        self.offset = 0
+
+    def update(self):
+
+        """
+        Parse the lines appended to the file since the last update
+
+        Returns:
+            - n_items: number of new items reported by parse_lines
+        """
+
+        n_items = 0
+        while True:
+            offset = self.offset
+            lines, self.offset = \
+                fio.read_appended_lines(self.file_path, offset,
+                                        self.CHUNK_SIZE)
+            if self.offset < offset:
+                self.reset()
+                continue
+            if not lines:
+                break
+            n_items += self.parse_lines(lines)
+        return n_items
+
+    def parse_lines(self, lines):
+        raise NotImplementedError
+
+
+class FoamLog(AppendedFile):
+
+    """
+    Class representing the log file of a (running) OpenFOAM solver,
+    e.g. log.simpleFoam. The file is read incrementally, see AppendedFile,
+    and update returns the number of new lines. Extracted data is stored in
+    LogSeries tables:
+    - residuals: python dictionary with field names as keys and tables with
+                 the columns time, initial, final and iterations as values
+    - courant: table with the columns time, mean and max
+    - continuity: table with the columns time, sum_local, global and
+                  cumulative
+    - execution_time: table with the columns time, execution and clock
+    """
+
+    RE_TIME = re.compile('^Time = ' + NUM)
+    RE_RESIDUAL = re.compile(
+        r'^\s*\w+:\s+Solving for (\w+), Initial residual = ' + NUM
+        + r', Final residual = ' + NUM + r', No Iterations (\d+)')
+    RE_COURANT = re.compile(
+        r'^\s*Courant Number mean: ' + NUM + r' max: ' + NUM)
+    RE_CONTINUITY = re.compile(
+        r'^\s*time step continuity errors : sum local = ' + NUM
+        + r', global = ' + NUM + r', cumulative = ' + NUM)
+    RE_EXECUTION_TIME = re.compile(
+        r'^\s*ExecutionTime = ' + NUM + r' s\s+ClockTime = ' + NUM)
+
+    RESIDUAL_COLUMNS = ('time', 'initial', 'final', 'iterations')
+
+    def reset(self):
+
+        """
+        Discard all parsed data and start reading from the beginning of file
+        """
+
+        super().reset()
+        self.time = np.nan
+        self.residuals = {}
+        self.courant = LogSeries(('time', 'mean', 'max'))
+        self.continuity = LogSeries(
+            ('time', 'sum_local', 'global', 'cumulative'))
+        self.execution_time = LogSeries(('time', 'execution', 'clock'))
+
+    def parse_lines(self, lines):
+
+        """
+        Extract residuals, Courant numbers, continuity errors and
+        execution times from log lines and append them to the stored tables
+
+        Inputs:
+            - lines: list of complete log lines
+        Returns:
+            - n_lines: number of parsed lines
+        """
+
+        residuals = {}
+        courant = []
+        continuity = []
+        execution_time = []
+        time = self.time
+        for line in lines:
+            # Cheap substring tests before any regular expression matching
+            if 'Solving for' in line:
+                match = self.RE_RESIDUAL.match(line)
+                if match:
+                    field = match.group(1)
+                    residuals.setdefault(field, []).append(
+                        (time, float(match.group(2)),
+                         float(match.group(3)), int(match.group(4))))
+            elif line.startswith('Time = '):
+                match = self.RE_TIME.match(line)
+                if match:
+                    time = float(match.group(1))
+            elif 'Courant Number' in line:
+                match = self.RE_COURANT.match(line)
+                if match:
+                    courant.append((time, float(match.group(1)),
+                                    float(match.group(2))))
+            elif 'continuity errors' in line:
+                match = self.RE_CONTINUITY.match(line)
+                if match:
+                    continuity.append((time, float(match.group(1)),
+                                       float(match.group(2)),
+                                       float(match.group(3))))
+            elif 'ExecutionTime' in line:
+                match = self.RE_EXECUTION_TIME.match(line)
+                if match:
+                    execution_time.append((time, float(match.group(1)),
+                                           float(match.group(2))))
+        self.time = time
+
+        for field, rows in residuals.items():
+            if field not in self.residuals:
+                self.residuals[field] = LogSeries(self.RESIDUAL_COLUMNS)
+            self.residuals[field].append(rows)
+        self.courant.append(courant)
+        self.continuity.append(continuity)
+        self.execution_time.append(execution_time)
+        return len(lines)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+
+import os
+import re
+import numpy as np
+import file_io_functions as fio
+import foam_field as ff
+
+# Number of faces processed at once when computing face centres
+FACE_CHUNK_SIZE = 1000000
+
+re_list_start = re.compile(r'^[ \t]*(\d+)\s*\(', re.MULTILINE)
+re_class = re.compile(r'\bclass\s+(\w+)\s*;')
+re_cell_labels = re.compile(r'\bcellLabels\s+List<label>\s*(\d+)\s*\(')
+
+
+def find_lists(text, item_type, binary, n_lists=1):
+
+    """
+    Find the consecutive top-level lists following the header of a polyMesh
+    file, e.g. the points list or the two lists of a faceCompactList
+
+    Inputs:
+        - text: content of the polyMesh file as string
+        - item_type: OF type of the list items, e.g. 'vector' or 'label'
+        - binary: bool to indicate whether the file has binary format
+        - n_lists: number of consecutive lists (default: 1)
+    Returns:
+        - lists: list of (body, n_items) tuples
+    """
+
+    header_end = text.find('}', text.find('FoamFile')) + 1
+    lists = []
+    pos = header_end
+    for i in range(n_lists):
+        match = re_list_start.search(text, pos)
+        if not match:
+            raise ValueError('List not found in polyMesh file')
+        n_items = int(match.group(1))
+        end = fio.find_list_body_end(text, match.end(), item_type, n_items,
+                                     binary)
+        if end < 0:
+            raise ValueError('End of list not found in polyMesh file')
+        lists.append((text[match.end():end], n_items))
+        pos = end + 1
+    return lists
+
+
+def read_mesh_list(file_path, item_type):
+
+    """
+    Read a polyMesh list file like points, owner or neighbour
+
+    Inputs:
+        - file_path: path of the polyMesh file
+        - item_type: OF type of the list items, e.g. 'vector' or 'label'
+    Returns:
+        - values: NumPy array of the list items
+    """
+
+    text = ff.read_foam_text(file_path)
+    binary = ff.is_binary(text)
+    body, n_items = find_lists(text, item_type, binary)[0]
+    return ff.decode_list(body, item_type, n_items, binary)
+
+
+def read_faces(file_path):
+
+    """
+    Read the polyMesh faces file in compact form
+
+    Inputs:
+        - file_path: path of the polyMesh faces file
+    Returns:
+        - offsets: array of n_faces + 1 start indices of faces in labels
+        - labels: array of point labels of all faces
+    """
+
+    text = ff.read_foam_text(file_path)
+    binary = ff.is_binary(text)
+    match = re_class.search(text, 0, 4096)
+    if match and match.group(1) == 'faceCompactList':
+        lists = find_lists(text, 'label', binary, 2)
+        offsets = ff.decode_list(lists[0][0], 'label', lists[0][1], binary)
+        labels = ff.decode_list(lists[1][0], 'label', lists[1][1], binary)
+        return offsets.astype(np.int64), labels.astype(np.int64)
+
+    # Ascii faceList, e.g. 4(0 1 2 3), decoded at once with each opening
+    # bracket replaced by the marker -1 following the face size
+    header_end = text.find('}', text.find('FoamFile')) + 1
+    match = re_list_start.search(text, header_end)
+    if not match:
+        raise ValueError('List not found in polyMesh file')
+    n_faces = int(match.group(1))
+    end = fio.find_list_body_end(text, match.end(), 'face', n_faces)
+    if end < 0:
+        raise ValueError('End of list not found in polyMesh file')
+    if n_faces == 0:
+        return np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64)
+    body = text[match.end():end].replace('(', ' -1 ')
+    values = np.fromstring(body.translate(ff.BRACKET_TABLE),
+                           dtype=np.int64, sep=' ')
+    marker_ids = np.flatnonzero(values == -1)
+    if len(marker_ids) != n_faces or marker_ids[0] != 1:
+        raise ValueError('Expected {} faces in faces file'.format(n_faces))
+    sizes = values[marker_ids - 1]
+    offsets = np.zeros(n_faces + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    if offsets[-1] != len(values) - 2 * n_faces or np.any(
+            marker_ids != offsets[:-1] + 2 * np.arange(n_faces) + 1):
+        raise ValueError('Face sizes do not match the number of labels')
+    labels = np.delete(values, np.concatenate([marker_ids - 1, marker_ids]))
+    return offsets, labels
+
+
+def read_cell_zones(mesh_dir):
+
+    """
+    Read the cell labels of all cell zones of a polyMesh
+
+    Inputs:
+        - mesh_dir: path of the polyMesh directory, e.g. constant/polyMesh
+    Returns:
+        - zones: python dictionary with zone names as keys and
+                 cell label arrays as values
+    """
+
+    text = ff.read_foam_text(os.path.join(mesh_dir, 'cellZones'))
+    binary = ff.is_binary(text)
+    zones = {}
+    pos = 0
+    match = re_cell_labels.search(text, pos)
+    while match:
+        brace = text.rfind('{', 0, match.start())
+        name = text[max(brace - 256, 0):brace].split()[-1]
+        n_items = int(match.group(1))
+        end = fio.find_list_body_end(text, match.end(), 'label', n_items,
+                                     binary)
+        if end < 0:
+            raise ValueError('End of cellLabels of zone ' + name
+                             + ' not found')
+        zones[name] = ff.decode_list(text[match.end():end], 'label',
+                                     n_items, binary).astype(np.int64)
+        pos = end + 1
+        match = re_cell_labels.search(text, pos)
+    return zones
+
+
+def read_cell_set(mesh_dir, name):
+
+    """
+    Read the cell labels of a cell set, e.g. written by topoSet
+
+    Inputs:
+        - mesh_dir: path of the polyMesh directory, e.g. constant/polyMesh
+        - name: name of the cell set in the sets subdirectory
+    Returns:
+        - cells: cell label array
+    """
+
+    file_path = os.path.join(mesh_dir, 'sets', name)
+    return read_mesh_list(file_path, 'label').astype(np.int64)
+
+
+def compute_face_centres_and_areas(points, offsets, labels):
+
+    """
+    Compute face centres and area vectors by decomposing each face into
+    triangles around its average point, as done by OpenFOAM
+
+    Inputs:
+        - points: point array of shape (n_points, 3)
+        - offsets: array of n_faces + 1 start indices of faces in labels
+        - labels: array of point labels of all faces
+    Returns:
+        - centres: face centre array of shape (n_faces, 3)
+        - areas: face area vector array of shape (n_faces, 3)
+    """
+
+    n_faces = len(offsets) - 1
+    centres = np.empty((n_faces, 3))
+    areas = np.empty((n_faces, 3))
+    for first in range(0, n_faces, FACE_CHUNK_SIZE):
+        last = min(first + FACE_CHUNK_SIZE, n_faces)
+        starts = offsets[first:last] - offsets[first]
+        chunk_labels = labels[offsets[first]:offsets[last]]
+        sizes = np.diff(offsets[first:last + 1])
+        face_ids = np.repeat(np.arange(last - first), sizes)
+
+        # Triangles (p, q, estimated centre) along the face edges
+        p = points[chunk_labels]
+        next_ids = np.arange(1, len(chunk_labels) + 1)
+        next_ids[starts + sizes - 1] = starts
+        q = p[next_ids]
+        estimate = np.add.reduceat(p, starts, axis=0) / sizes[:, None]
+        c = estimate[face_ids]
+
+        normals = np.cross(q - p, c - p)
+        magnitudes = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+        sum_n = np.add.reduceat(normals, starts, axis=0)
+        sum_a = np.add.reduceat(magnitudes, starts)
+        sum_ac = np.add.reduceat(magnitudes[:, None] * (p + q + c),
+                                 starts, axis=0)
+        degenerate = sum_a < np.finfo(float).tiny
+        sum_a[degenerate] = 1.0
+        centres[first:last] = sum_ac / (3.0 * sum_a[:, None])
+        centres[first:last][degenerate] = estimate[degenerate]
+        areas[first:last] = 0.5 * sum_n
+    return centres, areas
+
+
+def compute_cell_centres(mesh_dir):
+
+    """
+    Compute the cell centres of a polyMesh by decomposing each cell into
+    pyramids over its faces, as done by OpenFOAM
+
+    Inputs:
+        - mesh_dir: path of the polyMesh directory, e.g. constant/polyMesh
+    Returns:
+        - centres: cell centre array of shape (n_cells, 3)
+    """
+
+    points = read_mesh_list(os.path.join(mesh_dir, 'points'), 'vector')
+    offsets, labels = read_faces(os.path.join(mesh_dir, 'faces'))
+    owner = read_mesh_list(os.path.join(mesh_dir, 'owner'), 'label')
+    neighbour = read_mesh_list(os.path.join(mesh_dir, 'neighbour'), 'label')
+    face_centres, face_areas = \
+        compute_face_centres_and_areas(points, offsets, labels)
+
+    n_cells = int(max(owner.max(), neighbour.max(initial=-1))) + 1
+    n_internal = len(neighbour)
+
+    def cell_sum(own_weights, nei_weights):
+        return np.bincount(owner, own_weights, n_cells) \
+            + np.bincount(neighbour, nei_weights, n_cells)
+
+    # Estimated cell centres as average of the face centres
+    n_cell_faces = cell_sum(None, None)
+    estimate = np.empty((n_cells, 3))
+    for i in range(3):
+        estimate[:, i] = cell_sum(face_centres[:, i],
+                                  face_centres[:n_internal, i]) \
+            / n_cell_faces
+
+    # Three times the pyramid volumes of owner and neighbour side
+    tiny = np.finfo(float).tiny
+    own_volumes = np.maximum(np.einsum(
+        'ij,ij->i', face_areas, face_centres - estimate[owner]), tiny)
+    nei_volumes = np.maximum(np.einsum(
+        'ij,ij->i', face_areas[:n_internal],
+        estimate[neighbour] - face_centres[:n_internal]), tiny)
+    cell_volumes = cell_sum(own_volumes, nei_volumes)
+
+    centres = np.empty((n_cells, 3))
+    for i in range(3):
+        own_centres = 0.75 * face_centres[:, i] + 0.25 * estimate[owner, i]
+        nei_centres = 0.75 * face_centres[:n_internal, i] \
+            + 0.25 * estimate[neighbour, i]
+        centres[:, i] = cell_sum(own_volumes * own_centres,
+                                 nei_volumes * nei_centres) / cell_volumes
+    return centres
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import sys
+from multiprocessing import shared_memory
+import numpy as np
+import foam_field as ff
+import foam_mesh as fm
+
+# Shared memory blocks attached in this process by block name
+_attached = {}
+
+
+def _open_block(block_name):
+    if sys.version_info >= (3, 13):
+        # Attaching processes must not unlink the block at their exit
+        return shared_memory.SharedMemory(name=block_name, track=False)
+    return shared_memory.SharedMemory(name=block_name)
+
+
+def _close_block(block):
+    try:
+        block.close()
+    except BufferError:
+        # Arrays still referencing the block keep its mapping alive
+        pass
+
+
+class SharedArrayHandle:
+
+    """
+    Lightweight, picklable reference to a NumPy array stored in shared
+    memory. Passing the handle to multiprocessing workers only transfers
+    the name of the shared memory block together with shape and data type,
+    and attach returns an array view of the block without copying.
+    """
+
+    def __init__(self, block_name, shape, dtype):
+        self.block_name = block_name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+
+    def __repr__(self):
+        return 'SharedArrayHandle({!r}, {}, {!r})'.format(
+            self.block_name, self.shape, self.dtype)
+
+    def attach(self):
+
+        """
+        Attach to the shared memory block. Blocks are attached once per
+        process and reused by later calls.
+
+        Returns:
+            - array: NumPy array backed by the shared memory block
+        """
+
+        if self.block_name not in _attached:
+            block = _open_block(self.block_name)
+            array = np.ndarray(self.shape, self.dtype, buffer=block.buf)
+            _attached[self.block_name] = (block, array)
+        return _attached[self.block_name][1]
+
+    def detach(self):
+
+        """
+        Release the mapping of the shared memory block in this process.
+        Arrays returned by attach must not be used afterwards.
+        """
+
+        block, array = _attached.pop(self.block_name, (None, None))
+        if block is not None:
+            del array
+            _close_block(block)
+
+
+class SharedFieldStore:
+
+    """
+    Class placing decoded field and mesh arrays in shared memory, so that
+    multiprocessing workers share a single copy of the data. Arrays are
+    stored by name and reference-counted: put and acquire increase, release
+    decreases the count and the shared memory block is freed when it
+    reaches zero. Closing the store frees all remaining blocks.
+    Example:
+        with SharedFieldStore() as store:
+            handle = store.load_internal_field('U', 'case/0/U')
+            pool.map(worker, [handle] * n_tasks)
+    """
+
+    def __init__(self):
+        self.arrays = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def __getitem__(self, name):
+        return self.arrays[name]['handle']
+
+    def put(self, name, values):
+
+        """
+        Copy an array into a new shared memory block
+
+        Inputs:
+            - name: name of the array in the store
+            - values: array-like data
+        Returns:
+            - handle: SharedArrayHandle of the stored array
+        """
+
+        if name in self.arrays:
+            raise ValueError('Array ' + name + ' is already stored')
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(values.nbytes, 1))
+        array = np.ndarray(values.shape, values.dtype, buffer=block.buf)
+        array[...] = values
+        handle = SharedArrayHandle(block.name, values.shape, values.dtype)
+        self.arrays[name] = {'block': block, 'array': array,
+                             'handle': handle, 'count': 1}
+        return handle
+
+    def load_internal_field(self, name, file_path, n_cells=None):
+
+        """
+        Read the internalField of a field file into the store
+
+        Inputs:
+            - name: name of the array in the store
+            - file_path: path of field file
+            - n_cells: number of cells to expand uniform values to
+                       (default: None)
+        Returns:
+            - handle: SharedArrayHandle of the stored array
+        """
+
+        return self.put(name, ff.read_internal_field(file_path, n_cells))
+
+    def load_cell_centres(self, mesh_dir, name='cellCentres'):
+
+        """
+        Compute the cell centres of a polyMesh into the store
+
+        Inputs:
+            - mesh_dir: path of the polyMesh directory
+            - name: name of the array in the store (default: 'cellCentres')
+        Returns:
+            - handle: SharedArrayHandle of the stored array
+        """
+
+        return self.put(name, fm.compute_cell_centres(mesh_dir))
+
+    def get_array(self, name):
+        return self.arrays[name]['array']
+
+    def acquire(self, name):
+
+        """
+        Add a reference to a stored array
+
+        Inputs:
+            - name: name of the array in the store
+        Returns:
+            - handle: SharedArrayHandle of the stored array
+        """
+
+        self.arrays[name]['count'] += 1
+        return self.arrays[name]['handle']
+
+    def release(self, name):
+
+        """
+        Remove a reference to a stored array and free its shared memory
+        block if no references are left
+
+        Inputs:
+            - name: name of the array in the store
+        """
+
+        item = self.arrays[name]
+        item['count'] -= 1
+        if item['count'] <= 0:
+            del self.arrays[name]
+            del item['array']
+            _close_block(item['block'])
+            item['block'].unlink()
+
+    def close(self):
+
+        """
+        Free the shared memory blocks of all stored arrays
+        """
+
+        for name in list(self.arrays):
+            self.arrays[name]['count'] = 1
+            self.release(name)
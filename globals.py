@@ -14,4 +14,12 @@ re_of_dim = re.compile(of_dim_pattern)
 of_vec_pattern = \
     '\(\s*'+num_pattern+'\s*'+num_pattern+'\s*'+num_pattern+'\s*\)'
 of_uni_vec_pattern = '\s*uniform\s*' + of_vec_pattern
-re_uni_vec = re.compile(of_uni_vec_pattern)
\ No newline at end of file
+re_uni_vec = re.compile(of_uni_vec_pattern)
+
+# Number of components of OpenFOAM primitive types in field lists
+FOAM_COMPONENTS = {'scalar': 1, 'vector': 3, 'sphericalTensor': 1,
+                   'symmTensor': 6, 'tensor': 9}
+
+# Byte sizes of labels and scalars in binary OpenFOAM files
+FOAM_LABEL_SIZE = 4
+FOAM_SCALAR_SIZE = 8